@@ -1,14 +1,24 @@
 import os
+import re
 import time
 import socket
+import signal
+import struct
+import sys
 import platform
 import subprocess
 import psutil
 import requests
 import json
 import logging
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
 from threading import Thread
+from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
 
 logging.basicConfig(
     filename='network_monitor.log',
@@ -16,6 +26,100 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+_system_getaddrinfo = socket.getaddrinfo
+
+_IS_WINDOWS = platform.system().lower() == 'windows'
+
+_WIN_PING_RE = re.compile(r'\((\d+)% loss.*?Average = (\d+)ms', re.S)
+_UNIX_PING_RE = re.compile(r'([\d.]+)% packet loss.*?= [\d.]+/([\d.]+)/', re.S)
+_PING_RE = _WIN_PING_RE if _IS_WINDOWS else _UNIX_PING_RE
+_PING_COUNT_FLAG = '-n' if _IS_WINDOWS else '-c'
+
+_CLEAR_SCREEN = "" if _IS_WINDOWS else "\033[2J\033[H"
+
+_DAY_FMT = "%Y%m%d"
+_FILE_STAMP_FMT = "%Y%m%d_%H%M%S"
+_DISPLAY_FMT = "%Y-%m-%d %H:%M:%S"
+
+_HEALTH_EMOJI = {
+    "good": "🟢 Good",
+    "warning": "🟡 Warning",
+    "critical": "🔴 Critical"
+}
+
+def _probe_reply_type(packet, dest, src_port, dest_port):
+    ihl = (packet[0] & 0x0f) * 4
+    if len(packet) < ihl + 8 + 20:
+        return None
+    
+    icmp_type = packet[ihl]
+    if icmp_type not in (3, 11):
+        return None
+    
+    quoted = packet[ihl + 8:]
+    quoted_ihl = (quoted[0] & 0x0f) * 4
+    if len(quoted) < quoted_ihl + 4 or quoted[9] != socket.IPPROTO_UDP:
+        return None
+    if socket.inet_ntoa(quoted[16:20]) != dest:
+        return None
+    if struct.unpack("!HH", quoted[quoted_ihl:quoted_ihl + 4]) != (src_port, dest_port):
+        return None
+    
+    return icmp_type
+
+@dataclass
+class ReportStats:
+    avg_ping: Optional[float]
+    min_ping: Optional[float]
+    max_ping: Optional[float]
+    website_access: Dict[str, float]
+    health_counts: Dict[str, int]
+    health_percentages: Dict[str, float]
+
+def _render_report(stats, now):
+    ping_lines = []
+    if stats.avg_ping is not None:
+        ping_lines.append(f"Average ping: {stats.avg_ping:.2f} ms (Minimum: {stats.min_ping:.2f} ms, Maximum: {stats.max_ping:.2f} ms)")
+    
+    return "\n".join([
+        "=" * 80,
+        f"Network Monitoring Report - {now.strftime(_DISPLAY_FMT)}",
+        "=" * 80,
+        "",
+        *ping_lines,
+        "\nWebsite access percentage:",
+        *(f"{website}: {percentage:.2f}%" for website, percentage in stats.website_access.items()),
+        "\nNetwork health status:",
+        *(f"{status}: {count} ({stats.health_percentages[status]:.2f}%)" for status, count in stats.health_counts.items())
+    ])
+
+def _make_analyzer(ping_threshold, packet_loss_threshold):
+    def analyze(ping_result):
+        if not ping_result["success"]:
+            return {
+                "status": "critical",
+                "message": "Internet is not accessible"
+            }
+        
+        if ping_result["packet_loss"] > packet_loss_threshold:
+            return {
+                "status": "warning",
+                "message": f"Packet loss: {ping_result['packet_loss']}%"
+            }
+        
+        if ping_result["avg_ping"] > ping_threshold:
+            return {
+                "status": "warning",
+                "message": f"High latency: {ping_result['avg_ping']} ms"
+            }
+        
+        return {
+            "status": "good",
+            "message": "Network is healthy"
+        }
+    
+    return analyze
+
 class AdvancedNetworkMonitor:
     def __init__(self):
         self.websites = [
@@ -25,14 +129,98 @@ class AdvancedNetworkMonitor:
             "wikipedia.org",
             "yahoo.com"
         ]
-        self.ping_threshold = 100
-        self.packet_loss_threshold = 5
-        self.history = []
+        self._ping_threshold = 100
+        self._packet_loss_threshold = 5
+        self._analyze = _make_analyzer(self._ping_threshold, self._packet_loss_threshold)
+        self.history = deque(maxlen=100)
+        self._cols = {
+            "ping_success": deque(maxlen=self.history.maxlen),
+            "ping_avg": deque(maxlen=self.history.maxlen),
+            "health_status": deque(maxlen=self.history.maxlen),
+            "website_ok": {website: deque(maxlen=self.history.maxlen) for website in self.websites}
+        }
+        self._health_counts = Counter(good=0, warning=0, critical=0)
+        self._website_access_counts = {website: 0 for website in self.websites}
+        self._ping_sum = 0.0
+        self._ping_count = 0
+        self._ping_min = deque()
+        self._ping_max = deque()
+        self._sample_index = 0
         self.alert_count = 0
+        self._json_fh = None
+        self._json_day = None
+        self._last_report_hour = None
+        self._stop_requested = False
+        
+        self.interfaces_cache_ttl = 60
+        self._interfaces_cache = None
+        self._interfaces_cache_time = 0
+        
+        self.dns_cache_ttl = 60
+        self.dns_negative_ttl = 60
+        self._dns_cache = {}
+        
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=8)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
         
         os.makedirs('network_data', exist_ok=True)
     
+    @property
+    def ping_threshold(self):
+        return self._ping_threshold
+    
+    @ping_threshold.setter
+    def ping_threshold(self, value):
+        self._ping_threshold = value
+        self._analyze = _make_analyzer(self._ping_threshold, self._packet_loss_threshold)
+    
+    @property
+    def packet_loss_threshold(self):
+        return self._packet_loss_threshold
+    
+    @packet_loss_threshold.setter
+    def packet_loss_threshold(self, value):
+        self._packet_loss_threshold = value
+        self._analyze = _make_analyzer(self._ping_threshold, self._packet_loss_threshold)
+    
+    def _cached_getaddrinfo(self, host, port, *args, **kwargs):
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        cached = self._dns_cache.get(key)
+        if cached:
+            result, error_args, timestamp = cached
+            ttl = self.dns_negative_ttl if error_args else self.dns_cache_ttl
+            if time.monotonic() - timestamp < ttl:
+                if error_args:
+                    raise socket.gaierror(*error_args)
+                return result
+        
+        try:
+            result = _system_getaddrinfo(host, port, *args, **kwargs)
+        except socket.gaierror as e:
+            self._dns_cache[key] = (None, e.args, time.monotonic())
+            raise
+        
+        self._dns_cache[key] = (result, None, time.monotonic())
+        return result
+    
+    @contextmanager
+    def _dns_cache_installed(self):
+        previous = socket.getaddrinfo
+        socket.getaddrinfo = self._cached_getaddrinfo
+        try:
+            yield
+        finally:
+            socket.getaddrinfo = previous
+    
+    def _cached_lookup(self, host):
+        return self._cached_getaddrinfo(host, None, socket.AF_INET)[0][4][0]
+    
     def get_network_interfaces(self):
+        if self._interfaces_cache is not None and time.monotonic() - self._interfaces_cache_time < self.interfaces_cache_ttl:
+            return self._interfaces_cache
+        
         interfaces_info = []
         
         for interface, addrs in psutil.net_if_addrs().items():
@@ -45,43 +233,30 @@ class AdvancedNetworkMonitor:
                         "broadcast": addr.broadcast
                     })
         
+        self._interfaces_cache = interfaces_info
+        self._interfaces_cache_time = time.monotonic()
         return interfaces_info
     
     def get_network_stats(self):
-        stats = psutil.net_io_counters()
-        return {
-            "bytes_sent": stats.bytes_sent,
-            "bytes_recv": stats.bytes_recv,
-            "packets_sent": stats.packets_sent,
-            "packets_recv": stats.packets_recv,
-            "errin": stats.errin,
-            "errout": stats.errout,
-            "dropin": stats.dropin,
-            "dropout": stats.dropout
-        }
+        return psutil.net_io_counters()._asdict()
     
     def ping_host(self, host, count=4):
-        param = '-n' if platform.system().lower() == 'windows' else '-c'
-        command = ['ping', param, str(count), host]
+        command = ['ping', _PING_COUNT_FLAG, str(count), host]
         
         try:
             output = subprocess.check_output(command).decode('utf-8')
             
-            if platform.system().lower() == 'windows':
-                avg_ping = float(output.split('Average = ')[1].split('ms')[0].strip())
-            else:
-                avg_ping = float(output.split('rtt min/avg/max/mdev = ')[1].split('/')[1])
+            match = _PING_RE.search(output)
+            if not match:
+                raise ValueError("Unable to parse ping output")
             
-            if platform.system().lower() == 'windows':
-                packet_loss = int(output.split('(')[1].split('%')[0])
-            else:
-                packet_loss = int(output.split('received, ')[1].split('%')[0])
+            packet_loss = int(float(match.group(1)))
+            avg_ping = float(match.group(2))
             
             return {
                 "success": True,
                 "avg_ping": avg_ping,
-                "packet_loss": packet_loss,
-                "raw_output": output
+                "packet_loss": packet_loss
             }
         except Exception as e:
             logging.error(f"Error pinging {host}: {str(e)}")
@@ -93,7 +268,7 @@ class AdvancedNetworkMonitor:
     def check_website_status(self, website):
         try:
             start_time = time.time()
-            response = requests.get(f"http://{website}", timeout=5)
+            response = self._session.get(f"http://{website}", timeout=5)
             response_time = (time.time() - start_time) * 1000
             
             return {
@@ -111,8 +286,62 @@ class AdvancedNetworkMonitor:
                 "error": str(e)
             }
     
+    def _trace_route_sockets(self, host, max_hops=30, timeout=1, max_time=20):
+        dest = self._cached_lookup(host)
+        hops = []
+        trace_deadline = time.perf_counter() + max_time
+        
+        with socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP) as recv_sock, \
+                socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP) as send_sock:
+            send_sock.bind(("", 0))
+            src_port = send_sock.getsockname()[1]
+            
+            for ttl in range(1, max_hops + 1):
+                if time.perf_counter() >= trace_deadline:
+                    break
+                
+                dest_port = 33434 + ttl
+                send_sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
+                start_time = time.perf_counter()
+                send_sock.sendto(b"", (dest, dest_port))
+                
+                hop_ip, rtt, icmp_type = None, None, None
+                deadline = min(start_time + timeout, trace_deadline)
+                while (remaining := deadline - time.perf_counter()) > 0:
+                    recv_sock.settimeout(remaining)
+                    try:
+                        packet, (addr, _) = recv_sock.recvfrom(512)
+                    except socket.timeout:
+                        break
+                    
+                    icmp_type = _probe_reply_type(packet, dest, src_port, dest_port)
+                    if icmp_type is not None:
+                        hop_ip, rtt = addr, (time.perf_counter() - start_time) * 1000
+                        break
+                
+                hops.append((ttl, hop_ip, rtt))
+                if icmp_type == 3:
+                    break
+        
+        return hops
+    
     def trace_route(self, host):
-        command = ['tracert' if platform.system().lower() == 'windows' else 'traceroute', host]
+        if not _IS_WINDOWS and os.geteuid() == 0:
+            try:
+                hops = self._trace_route_sockets(host)
+                output = "\n".join(
+                    f"{ttl:2d}  {hop_ip}  {rtt:.2f} ms" if hop_ip else f"{ttl:2d}  *"
+                    for ttl, hop_ip, rtt in hops
+                )
+                return {
+                    "success": True,
+                    "hops": hops,
+                    "output": output
+                }
+            except OSError as e:
+                logging.warning(f"In-process traceroute failed for {host}: {str(e)}")
+        
+        command = ['tracert' if _IS_WINDOWS else 'traceroute', host]
         
         try:
             output = subprocess.check_output(command, timeout=20).decode('utf-8')
@@ -142,41 +371,27 @@ class AdvancedNetworkMonitor:
             }
     
     def analyze_network_health(self, ping_result):
-        if not ping_result["success"]:
-            return {
-                "status": "critical",
-                "message": "Internet is not accessible"
-            }
-        
-        if ping_result["packet_loss"] > self.packet_loss_threshold:
-            return {
-                "status": "warning",
-                "message": f"Packet loss: {ping_result['packet_loss']}%"
-            }
-        
-        if ping_result["avg_ping"] > self.ping_threshold:
-            return {
-                "status": "warning",
-                "message": f"High latency: {ping_result['avg_ping']} ms"
-            }
-        
-        return {
-            "status": "good",
-            "message": "Network is healthy"
-        }
+        return self._analyze(ping_result)
     
     def collect_data(self):
-        timestamp = datetime.now().isoformat()
+        now = datetime.now()
+        timestamp = now.isoformat()
         
         interfaces = self.get_network_interfaces()
         
         network_stats = self.get_network_stats()
         
-        ping_result = self.ping_host("8.8.8.8")
-        
-        websites_status = {}
-        for website in self.websites:
-            websites_status[website] = self.check_website_status(website)
+        with self._dns_cache_installed():
+            executor = ThreadPoolExecutor(max_workers=len(self.websites) + 1)
+            try:
+                ping_future = executor.submit(self.ping_host, "8.8.8.8")
+                websites_status = dict(zip(
+                    self.websites,
+                    executor.map(self.check_website_status, self.websites)
+                ))
+                ping_result = ping_future.result()
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
         
         health_analysis = self.analyze_network_health(ping_result)
         
@@ -190,12 +405,19 @@ class AdvancedNetworkMonitor:
         }
         
         self.history.append(data)
+        self._update_aggregates(ping_result, websites_status, health_analysis["status"])
+        
+        day = now.strftime(_DAY_FMT)
+        if day != self._json_day:
+            self._close_json_file()
+            self._json_fh = open(f'network_data/network_data_{day}.json', 'a', buffering=65536)
+            self._json_day = day
         
-        if len(self.history) > 100:
-            self.history.pop(0)
+        json.dump(data, self._json_fh)
+        self._json_fh.write('\n')
         
-        with open(f'network_data/network_data_{datetime.now().strftime("%Y%m%d")}.json', 'a') as f:
-            f.write(json.dumps(data) + '\n')
+        if health_analysis["status"] == "critical":
+            self._interfaces_cache = None
         
         if health_analysis["status"] != "good":
             self.alert_count += 1
@@ -208,6 +430,59 @@ class AdvancedNetworkMonitor:
         
         return data
     
+    def _close_json_file(self):
+        if not self._json_fh:
+            return
+        
+        self._json_fh.flush()
+        if hasattr(os, "posix_fadvise"):
+            os.fdatasync(self._json_fh.fileno())
+            os.posix_fadvise(self._json_fh.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        self._json_fh.close()
+        self._json_fh = None
+    
+    def _update_aggregates(self, ping_result, websites_status, health_status):
+        cols = self._cols
+        
+        if len(cols["health_status"]) == self.history.maxlen:
+            self._health_counts[cols["health_status"][0]] -= 1
+            for website, column in cols["website_ok"].items():
+                self._website_access_counts[website] -= column[0]
+            if cols["ping_success"][0]:
+                self._ping_sum -= cols["ping_avg"][0]
+                self._ping_count -= 1
+        
+        cols["ping_success"].append(ping_result["success"])
+        cols["ping_avg"].append(ping_result.get("avg_ping"))
+        cols["health_status"].append(health_status)
+        for website, status in websites_status.items():
+            cols["website_ok"][website].append(status["accessible"])
+        
+        self._health_counts[health_status] += 1
+        for website, status in websites_status.items():
+            self._website_access_counts[website] += status["accessible"]
+        
+        index = self._sample_index
+        self._sample_index += 1
+        
+        window_start = index - self.history.maxlen + 1
+        for extremes in (self._ping_min, self._ping_max):
+            while extremes and extremes[0][0] < window_start:
+                extremes.popleft()
+        
+        if ping_result["success"]:
+            ping = ping_result["avg_ping"]
+            self._ping_sum += ping
+            self._ping_count += 1
+            
+            while self._ping_min and self._ping_min[-1][1] >= ping:
+                self._ping_min.pop()
+            self._ping_min.append((index, ping))
+            
+            while self._ping_max and self._ping_max[-1][1] <= ping:
+                self._ping_max.pop()
+            self._ping_max.append((index, ping))
+    
     def diagnose_network_issues(self):
         logging.info("Diagnosing network issues...")
         
@@ -220,7 +495,7 @@ class AdvancedNetworkMonitor:
             logging.error("Network routing problem")
         else:
             logging.info("Traceroute result saved")
-            with open(f'network_data/traceroute_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt', 'w') as f:
+            with open(f'network_data/traceroute_{datetime.now().strftime(_FILE_STAMP_FMT)}.txt', 'w') as f:
                 f.write(trace_result["output"])
         
         interfaces = self.get_network_interfaces()
@@ -235,144 +510,147 @@ class AdvancedNetworkMonitor:
             logging.error(f"Lost packets: Input={stats['dropin']}, Output={stats['dropout']}")
     
     def display_text_info(self, data):
-        os.system('cls' if platform.system().lower() == 'windows' else 'clear')
-        
-        print("=" * 60)
-        print(f"Advanced Network Monitoring - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 60)
+        if _IS_WINDOWS:
+            os.system('cls')
         
         health = data["health_analysis"]
-        health_status = {
-            "good": "🟢 Good",
-            "warning": "🟡 Warning",
-            "critical": "🔴 Critical"
-        }
         
-        print(f"\nNetwork status: {health_status.get(health['status'], health['status'])}")
-        print(f"Message: {health['message']}")
+        lines = []
+        lines.append(_CLEAR_SCREEN + "=" * 60)
+        lines.append(f"Advanced Network Monitoring - {datetime.now().strftime(_DISPLAY_FMT)}")
+        lines.append("=" * 60)
+        
+        lines.append(f"\nNetwork status: {_HEALTH_EMOJI.get(health['status'], health['status'])}")
+        lines.append(f"Message: {health['message']}")
         
-        print("\nNetwork card information:")
-        print("-" * 60)
+        lines.append("\nNetwork card information:")
+        lines.append("-" * 60)
         for interface in data["interfaces"]:
-            print(f"Network card: {interface['interface']}")
-            print(f"IP address: {interface['ip']}")
-            print(f"Netmask: {interface['netmask']}")
-            print(f"Broadcast: {interface['broadcast']}")
-            print("-" * 30)
+            lines.append(f"Network card: {interface['interface']}")
+            lines.append(f"IP address: {interface['ip']}")
+            lines.append(f"Netmask: {interface['netmask']}")
+            lines.append(f"Broadcast: {interface['broadcast']}")
+            lines.append("-" * 30)
         
         stats = data["network_stats"]
-        print("\nNetwork traffic statistics:")
-        print("-" * 60)
-        print(f"Bytes sent: {stats['bytes_sent'] / (1024*1024):.2f} MB")
-        print(f"Bytes received: {stats['bytes_recv'] / (1024*1024):.2f} MB")
-        print(f"Packets sent: {stats['packets_sent']}")
-        print(f"Packets received: {stats['packets_recv']}")
-        print(f"Input errors: {stats['errin']}")
-        print(f"Output errors: {stats['errout']}")
-        print(f"Lost input packets: {stats['dropin']}")
-        print(f"Lost output packets: {stats['dropout']}")
+        lines.append("\nNetwork traffic statistics:")
+        lines.append("-" * 60)
+        lines.append(f"Bytes sent: {stats['bytes_sent'] / (1024*1024):.2f} MB")
+        lines.append(f"Bytes received: {stats['bytes_recv'] / (1024*1024):.2f} MB")
+        lines.append(f"Packets sent: {stats['packets_sent']}")
+        lines.append(f"Packets received: {stats['packets_recv']}")
+        lines.append(f"Input errors: {stats['errin']}")
+        lines.append(f"Output errors: {stats['errout']}")
+        lines.append(f"Lost input packets: {stats['dropin']}")
+        lines.append(f"Lost output packets: {stats['dropout']}")
         
         ping = data["ping_result"]
-        print("\nPing results to 8.8.8.8:")
-        print("-" * 60)
+        lines.append("\nPing results to 8.8.8.8:")
+        lines.append("-" * 60)
         if ping["success"]:
-            print(f"Average ping: {ping['avg_ping']:.2f} ms")
-            print(f"Packet loss: {ping['packet_loss']}%")
+            lines.append(f"Average ping: {ping['avg_ping']:.2f} ms")
+            lines.append(f"Packet loss: {ping['packet_loss']}%")
         else:
-            print(f"Ping failed: {ping.get('error', 'Unknown error')}")
+            lines.append(f"Ping failed: {ping.get('error', 'Unknown error')}")
         
-        print("\nWebsite status:")
-        print("-" * 60)
+        lines.append("\nWebsite status:")
+        lines.append("-" * 60)
         for website, status in data["websites_status"].items():
             if status["accessible"]:
-                print(f"{website}: Accessible (Code {status['status']}, Response time: {status['response_time']:.2f} ms)")
+                lines.append(f"{website}: Accessible (Code {status['status']}, Response time: {status['response_time']:.2f} ms)")
             else:
-                print(f"{website}: Not accessible ({status.get('error', 'Unknown error')})")
+                lines.append(f"{website}: Not accessible ({status.get('error', 'Unknown error')})")
         
-        print("\nData is saved in the 'network_data' folder.")
-        print("Logs are saved in the 'network_monitor.log' file.")
-        print("\nMonitoring... (Press Ctrl+C to exit)")
+        lines.append("\nData is saved in the 'network_data' folder.")
+        lines.append("Logs are saved in the 'network_monitor.log' file.")
+        lines.append("\nMonitoring... (Press Ctrl+C to exit)")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
     
     def generate_report(self):
         if not self.history:
             return "No data available for reporting."
         
-        report = []
-        report.append("=" * 80)
-        report.append(f"Network Monitoring Report - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append("=" * 80)
-        report.append("")
-        
-        avg_pings = []
-        for data in self.history:
-            if data["ping_result"]["success"]:
-                avg_pings.append(data["ping_result"]["avg_ping"])
-        
-        if avg_pings:
-            avg_ping = sum(avg_pings) / len(avg_pings)
-            min_ping = min(avg_pings)
-            max_ping = max(avg_pings)
-            report.append(f"Average ping: {avg_ping:.2f} ms (Minimum: {min_ping:.2f} ms, Maximum: {max_ping:.2f} ms)")
-        
-        website_access = {}
-        for website in self.websites:
-            access_count = 0
-            for data in self.history:
-                if data["websites_status"][website]["accessible"]:
-                    access_count += 1
-            
-            if self.history:
-                access_percentage = (access_count / len(self.history)) * 100
-                website_access[website] = access_percentage
-        
-        report.append("\nWebsite access percentage:")
-        for website, percentage in website_access.items():
-            report.append(f"{website}: {percentage:.2f}%")
-        
-        health_counts = {"good": 0, "warning": 0, "critical": 0}
-        for data in self.history:
-            status = data["health_analysis"]["status"]
-            health_counts[status] = health_counts.get(status, 0) + 1
-        
-        report.append("\nNetwork health status:")
-        for status, count in health_counts.items():
-            if self.history:
-                percentage = (count / len(self.history)) * 100
-                report.append(f"{status}: {count} ({percentage:.2f}%)")
+        now = datetime.now()
+        if self._ping_count:
+            avg_ping = self._ping_sum / self._ping_count
+            min_ping = self._ping_min[0][1]
+            max_ping = self._ping_max[0][1]
+        else:
+            avg_ping = min_ping = max_ping = None
+        
+        sample_count = len(self.history)
+        stats = ReportStats(
+            avg_ping=avg_ping,
+            min_ping=min_ping,
+            max_ping=max_ping,
+            website_access={
+                website: (access_count / sample_count) * 100
+                for website, access_count in self._website_access_counts.items()
+            },
+            health_counts=dict(self._health_counts),
+            health_percentages={
+                status: (count / sample_count) * 100
+                for status, count in self._health_counts.items()
+            }
+        )
         
-        report_text = "\n".join(report)
-        report_file = f'network_data/report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt'
+        report_text = _render_report(stats, now)
+        report_file = f'network_data/report_{now.strftime(_FILE_STAMP_FMT)}.txt'
         
         with open(report_file, 'w') as f:
             f.write(report_text)
         
         return report_text
     
+    def _handle_stop(self, signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        self._stop_requested = True
+    
+    def _wait_for_next_cycle(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self._stop_requested and (remaining := deadline - time.monotonic()) > 0:
+            time.sleep(min(remaining, 0.2))
+    
     def run(self):
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._handle_stop)
+        
+        logging.info("Starting network monitoring")
+        print("Starting network monitoring...")
+        
+        self._last_report_hour = datetime.now().hour
+        
         try:
-            logging.info("Starting network monitoring")
-            print("Starting network monitoring...")
-            
-            while True:
+            while not self._stop_requested:
                 data = self.collect_data()
                 
                 self.display_text_info(data)
                 
                 current_time = datetime.now()
-                if current_time.minute == 0 and current_time.second < 10:
+                if current_time.hour != self._last_report_hour:
+                    self._last_report_hour = current_time.hour
                     report = self.generate_report()
                     logging.info("Hourly report generated")
                 
-                time.sleep(10)
-                
-        except KeyboardInterrupt:
+                self._wait_for_next_cycle(10)
+            
             print("\nMonitoring stopped.")
             logging.info("Network monitoring stopped")
             
             print("\nGenerating final report...")
             report = self.generate_report()
             print(f"Final report saved to file.")
-            print("Exiting program.")
+        except KeyboardInterrupt:
+            print("\nMonitoring aborted.")
+            logging.info("Network monitoring aborted")
+        finally:
+            self._close_json_file()
+        
+        print("Exiting program.")
 
 if __name__ == "__main__":
     monitor = AdvancedNetworkMonitor()